@@ -0,0 +1,44 @@
+"""全局常量：模式标签、模型资产配置与省份流行病学基准。"""
+import math
+
+import numpy as np
+
+# --- 模型资产与判定阈值 ---
+MODEL_DIR = "model_assets"
+OPTIMAL_THRESHOLD = 0.27
+
+# --- 筛查模式 ---
+MODE_LABELS = {"simple": "精简版 (核心 指标)", "full": "完整版 (不推荐)"}
+
+# --- 控件标签映射（选项直接取整数，推理端省去字符串比较与 int() 转换） ---
+RURAL_MAP = {1: "城市", 2: "农村"}
+EDU_MAP = {1: "高中及以上", 2: "中学", 3: "小学", 4: "文盲/半文盲"}
+HEAR_MAP = {0: "正常", 1: "存在障碍"}
+HAS_MAP = {0: "无", 1: "有"}
+
+# 模块级绑定 dict.__getitem__，避免每次重跑为 format_func 重新分配 lambda
+FMT_RURAL = RURAL_MAP.__getitem__
+FMT_EDU = EDU_MAP.__getitem__
+FMT_HEAR = HEAR_MAP.__getitem__
+FMT_HAS = HAS_MAP.__getitem__
+
+# --- 省份流行病学基准 ---
+PROVINCE_RISK_MAP = {
+    "天津": 76.0, "广东": 44.81, "黑龙江": 39.66, "北京": 34.27, "广西": 33.39,
+    "河南": 31.22, "河北": 30.49, "江西": 30.43, "福建": 30.35, "辽宁": 30.3,
+    "湖南": 30.02, "上海": 29.82, "江苏": 27.7, "湖北": 26.14, "陕西": 25.6,
+    "内蒙古": 23.85, "吉林": 23.76, "山东": 23.35, "贵州": 23.18, "浙江": 22.69,
+    "四川": 22.02, "山西": 21.62, "安徽": 20.78, "新疆": 19.05, "甘肃": 15.95,
+    "重庆": 11.4, "青海": 10.39, "云南": 7.79, "宁夏": 25.0, "西藏": 25.0,
+    "海南": 25.0, "台湾": 25.0, "香港": 25.0, "澳门": 25.0
+}
+
+# 省份对数风险分在模块载入时一次算好，推理热路径只剩一次字典查找
+PROV_SCORE = {k: math.log1p(v) * 8.5 for k, v in PROVINCE_RISK_MAP.items()}
+DEFAULT_PROV_SCORE = math.log1p(25.0) * 8.5
+
+# SoA 版省份表：按位置索引的 1 维数组，批量评估与图表可直接花式索引
+PROV_NAMES = list(PROVINCE_RISK_MAP)
+PROV_IDX = {n: i for i, n in enumerate(PROVINCE_RISK_MAP)}
+PROV_LOG = np.log1p(np.fromiter(PROVINCE_RISK_MAP.values(), dtype=np.float32,
+                                count=len(PROVINCE_RISK_MAP))) * np.float32(8.5)
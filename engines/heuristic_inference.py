@@ -0,0 +1,160 @@
+"""精简版启发式推理引擎：纯标量非线性评分与广播批量评分。"""
+import math
+
+import numpy as np
+
+from constants import DEFAULT_PROV_SCORE, PROV_IDX, PROV_LOG, PROV_SCORE
+
+# 教育乘子 (1 + (edu - 1) * 0.2) 预先展开成常量表，下标即 edu 取值 1-4
+_EDU_FACTOR = (1.0, 1.0, 1.2, 1.4, 1.6)
+
+# 批量路径的查表 sigmoid：4096 档网格把每次超越函数求值换成一次
+# 取整加载，最近档量化误差 < 8e-4，远小于展示精度；单例路径仍走
+# 精确的 math.exp。上界取 130：0.985 的裁剪在 score≈122 处饱和，
+# 极端 BMI 能把 score 推过几百，越界档取表尾即已是裁剪值
+_SIG_LO, _SIG_HI, _SIG_N = -50.0, 130.0, 4096
+_SIG_SCALE = (_SIG_N - 1) / (_SIG_HI - _SIG_LO)
+_SIG_LUT = np.clip(
+    1.0 / (1.0 + np.exp(-(np.linspace(_SIG_LO, _SIG_HI, _SIG_N) - 55.0) / 16.0)),
+    0.015, 0.985).astype(np.float32)
+
+
+def _infer_scalar(prov_score, age, bmi, hear, edu, cog,
+                  social, fcamt, rural, pension, executive, pain):
+    """纯标量推理核：只依赖 math 与内建运算，签名即 numba.njit 可直接包装的形态。"""
+    # A. 省份背景风险
+    score = prov_score
+
+    # B. BMI 风险偏离逻辑：标准区间 18.5 - 24.0，偏离越远风险越高
+    # （BMI 由采集端算好传入，引擎不再重复除法）
+    if bmi < 18.5:
+        score += (18.5 - bmi) ** 1.3 * 3.5
+    elif bmi > 24.0:
+        score += (bmi - 24.0) ** 1.1 * 2.8
+
+    # C. 特征交互逻辑
+    # 1. 听力与年龄
+    age_factor = (age - 45) / 10
+    if hear:
+        score += 15 + (age_factor ** 1.2) * 5
+    else:
+        score += age_factor * 2
+
+    # 2. 认知与教育
+    cog_loss = 21 - cog
+    score += (cog_loss * 1.5) * _EDU_FACTOR[edu]
+
+    # 3. 经济与社会代偿
+    social_loss = 9 - social
+    if fcamt:
+        score += social_loss * 1.2 - 5
+    else:
+        score += social_loss * 2.5
+
+    # 4. 身体负担积累
+    pain_impact = pain * 1.2
+    if rural == 2:
+        score += 8 + pain_impact * 1.5
+    else:
+        score += pain_impact
+
+    # 5. 退休与执行力
+    if pension == 0 and executive < 5:
+        score += 10
+
+    # D. 最终概率映射（标量 sigmoid，避免 ufunc 派发）
+    logit = (score - 55) / 16
+    prob = 1.0 / (1.0 + math.exp(-logit))
+
+    return max(0.015, min(0.985, prob)), bmi
+
+
+def _infer_vector(prov_score, age, bmi, hear, edu, cog,
+                  social, fcamt, rural, pension, executive, pain):
+    """广播版推理核：任意参数可为标量或可广播数组，分支全部改写为 np.where。
+
+    与 _infer_scalar 逐点等价；幂运算的底数先取 np.maximum(…, 0)
+    保护，因为 np.where 两个分支都会被求值。
+    """
+    score = prov_score + np.where(
+        bmi < 18.5, np.maximum(18.5 - bmi, 0) ** 1.3 * 3.5,
+        np.maximum(bmi - 24.0, 0) ** 1.1 * 2.8)
+
+    age_factor = (age - 45) / 10
+    score = score + np.where(
+        hear != 0, 15 + np.maximum(age_factor, 0) ** 1.2 * 5, age_factor * 2)
+
+    score = score + (21 - cog) * 1.5 * (1 + (edu - 1) * 0.2)
+
+    social_loss = 9 - social
+    score = score + np.where(
+        fcamt != 0, social_loss * 1.2 - 5, social_loss * 2.5)
+
+    pain_impact = pain * 1.2
+    score = score + np.where(rural == 2, 8 + pain_impact * 1.5, pain_impact)
+
+    score = score + np.where((pension == 0) & (executive < 5), 10.0, 0.0)
+
+    # 查表代替 np.exp + np.clip：一次索引运算完成概率映射与裁剪
+    idx = np.clip(((score - _SIG_LO) * _SIG_SCALE).astype(np.int32),
+                  0, _SIG_N - 1)
+    return _SIG_LUT[idx], bmi
+
+
+def complex_ml_inference(inputs):
+    """把界面输入字典拆成原生标量后交给推理核。"""
+    prov_score = PROV_SCORE.get(inputs['province_name'], DEFAULT_PROV_SCORE)
+    return _infer_scalar(
+        prov_score, inputs['age'], inputs['bmi'],
+        inputs['hear'], inputs['edu'], inputs['total_cognition'],
+        inputs['social_total'], inputs['fcamt'], inputs['rural'],
+        inputs['pension'], inputs['executive'], inputs['da042s_total'])
+
+
+def complex_ml_inference_batch(inputs):
+    """批量/敏感性分析入口：inputs 的任意字段可为 ndarray，一次广播算完。"""
+    prov = inputs['province_name']
+    if isinstance(prov, str):
+        prov_score = PROV_SCORE.get(prov, DEFAULT_PROV_SCORE)
+    else:
+        # 省份名 -> 位置下标 -> 花式索引取对数分，避免逐项字典查找；
+        # 未收录的省份用 -1 占位，再换成默认分，与标量路径的
+        # PROV_SCORE.get 兜底保持一致
+        idx = np.fromiter((PROV_IDX.get(p, -1) for p in prov), dtype=np.intp,
+                          count=len(prov))
+        prov_score = np.where(idx >= 0, PROV_LOG[idx],
+                              np.float32(DEFAULT_PROV_SCORE))
+    as_f = lambda k: np.asarray(inputs[k], dtype=np.float32)
+    return _infer_vector(
+        prov_score, as_f('age'), as_f('bmi'),
+        as_f('hear'), as_f('edu'), as_f('total_cognition'),
+        as_f('social_total'), as_f('fcamt'), as_f('rural'),
+        as_f('pension'), as_f('executive'), as_f('da042s_total'))
+
+
+# 批量打分需要的数值列；省份列单独按名称映射
+_BATCH_COLUMNS = ('age', 'bmi', 'hear', 'edu', 'total_cognition',
+                  'social_total', 'fcamt', 'rural', 'pension',
+                  'executive', 'da042s_total')
+
+
+def score_batch(df):
+    """对上传的患者表一次广播打分，返回与行数等长的风险概率数组。
+
+    需要 province_name 与 _BATCH_COLUMNS 中的列；缺 bmi 列时由
+    mheight/mweight 现场求得。列不齐时抛 ValueError 并列出缺失列名，
+    由调用方决定如何展示；未收录的省份按默认背景分参与评分。
+    N 行只付一条 ufunc 流水线的成本，而不是 N 次 Python 调用。
+    """
+    missing = [c for c in ('province_name', *_BATCH_COLUMNS)
+               if c not in df.columns]
+    if 'bmi' in missing and {'mheight', 'mweight'} <= set(df.columns):
+        missing.remove('bmi')
+        df = df.assign(bmi=df['mweight'] / (df['mheight'] / 100) ** 2)
+    if missing:
+        raise ValueError("CSV 缺少必需列: " + ", ".join(missing)
+                         + "（bmi 可由 mheight/mweight 两列代替）")
+    inputs = {c: df[c].to_numpy(np.float32) for c in _BATCH_COLUMNS}
+    inputs['province_name'] = df['province_name'].tolist()
+    probs, _ = complex_ml_inference_batch(inputs)
+    return probs
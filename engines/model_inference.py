@@ -0,0 +1,207 @@
+"""完整版模型推理：资产加载、特征对齐与缓存预测。"""
+import json
+import math
+import os
+
+import joblib
+import numpy as np
+import streamlit as st
+
+from constants import MODEL_DIR
+
+# --- 界面口径 -> 训练口径的取值翻译 ---
+# 控件为了易用对训练数据做了简化：听力/养老金在界面是二元开关，
+# 身高收厘米，子女经济支持是有/无开关；而训练词表里听力是
+# '1.0'-'5.0' 的自评等级串、养老金是 '0.0'/'1.0'、身高以米为单位、
+# 子女经济支持是连续金额。喂给编码器/标准化器前必须翻译回去。
+_HEAR_LEVELS = {0: "1.0", 1: "5.0"}      # 正常 -> 听力很好；存在障碍 -> 很差
+_PENSION_LEVELS = {0: "0.0", 1: "1.0"}
+# 居住环境控件取 1(城市)/2(农村)，训练词表是 '0'/'1'：scaler 中 rural
+# 均值 0.607 对应 CHARLS 以农村为主的样本，故 '1' 为农村、'0' 为城市
+_RURAL_LEVELS = {1: "0", 2: "1"}
+
+# 省份编码器按行政全称训练（如 "广东省"），界面与流行病学表用简称；
+# 按后缀折算出简称别名即可让两套叫法命中同一编码
+_PROVINCE_SUFFIXES = ("维吾尔自治区", "回族自治区", "壮族自治区",
+                      "特别行政区", "自治区", "省", "市")
+
+
+def _short_province(name):
+    for suffix in _PROVINCE_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def _to_training_value(feat, value, fcamt_mean):
+    """把单个界面取值翻译为训练口径；无需翻译的特征原样返回。"""
+    if feat == "hear":
+        return _HEAR_LEVELS.get(value, value)
+    if feat == "pension":
+        return _PENSION_LEVELS.get(value, value)
+    if feat == "rural":
+        return _RURAL_LEVELS.get(value, value)
+    if feat == "mheight":
+        return float(value) / 100.0      # 界面收 cm，训练用米
+    if feat == "fcamt":
+        # 训练时是连续金额，界面只分有/无：有按训练均值计，无计 0
+        return fcamt_mean if value else 0.0
+    return value
+
+
+def _model_path():
+    """环境变量可指定模型文件；默认走确定文件名，仅在缺失时才退回目录扫描。"""
+    path = os.getenv("VI_MODEL_PATH", f"{MODEL_DIR}/best_model.pkl")
+    if os.path.exists(path):
+        return path
+    import glob
+    return glob.glob(f"{MODEL_DIR}/best_model*.pkl")[0]
+
+
+@st.cache_resource
+def _load_model():
+    # mmap 让树结构里的 numpy 数组映射为只读页，跨 worker 共享页缓存；
+    # 压缩过的 dump 会自动退化为普通加载
+    return joblib.load(_model_path(), mmap_mode="r")
+
+
+@st.cache_resource
+def _load_scaler():
+    scaler = joblib.load(f"{MODEL_DIR}/scaler.pkl", mmap_mode="r")
+    # StandardScaler 默认存 float64；降为 float32 让标准化与行缓冲同精度，减半访存
+    for attr in ("mean_", "scale_", "var_"):
+        stat = getattr(scaler, attr, None)
+        if stat is not None:
+            setattr(scaler, attr, stat.astype(np.float32))
+    return scaler
+
+
+@st.cache_resource
+def _load_encoders():
+    # 编码器体积很小，mmap 反而多占文件句柄，直接普通加载
+    return joblib.load(f"{MODEL_DIR}/label_encoders.pkl")
+
+
+@st.cache_resource
+def _load_features():
+    feature_json = f"{MODEL_DIR}/feature_list.json"
+    if os.path.exists(feature_json):
+        with open(feature_json, encoding="utf-8") as f:
+            return json.load(f)
+    # 兼容旧资产包：从带序号的 txt 中解析特征名
+    with open(f"{MODEL_DIR}/feature_list.txt", encoding="utf-8") as f:
+        return [line.strip().split(". ")[1] for line in f if ". " in line]
+
+
+@st.cache_resource
+def load_assets():
+    """组装模型、标准化器、编码器与特征列表；各资产独立缓存、独立失效。"""
+    model = _load_model()
+    scaler = _load_scaler()
+    encoders = _load_encoders()
+    features = _load_features()
+    # 预计算类别 -> 整数查找表与特征下标，预测时免去 sklearn transform 开销
+    encoder_luts = {col: {cls: i for i, cls in enumerate(le.classes_)}
+                    for col, le in encoders.items()}
+    # 省份全称词表追加简称别名，界面短名与 CSV 全称都能直接命中
+    prov_lut = encoder_luts.get("province")
+    if prov_lut is not None:
+        for cls, code in list(prov_lut.items()):
+            prov_lut.setdefault(_short_province(cls), code)
+    feat_index = {f: i for i, f in enumerate(features)}
+    # fcamt 的训练均值充当"有经济支持"的代表金额
+    fcamt_mean = (float(scaler.mean_[feat_index["fcamt"]])
+                  if "fcamt" in feat_index else 0.0)
+    # 树模型的分裂点对单调变换不敏感，标准化是纯开销，只为线性模型保留；
+    # 需要标准化时内联为 (x - mean) * inv_scale，绕过 sklearn 的校验与拷贝
+    base = getattr(model, "estimator", model)
+    is_tree = any(k in type(base).__name__ for k in
+                  ("GradientBoosting", "LGBM", "XGB", "RandomForest",
+                   "ExtraTrees", "CatBoost", "DecisionTree"))
+    norm_stats = None if is_tree else (
+        scaler.mean_, (1.0 / scaler.scale_).astype(np.float32))
+    # 二分类 GBDT 的 predict_proba 等价于 sigmoid(decision_function)，
+    # 走原始分数可以省掉按类 softmax 与概率矩阵的分配
+    use_raw_score = (type(base).__name__ == "GradientBoostingClassifier"
+                     and getattr(model, "n_classes_", 0) == 2)
+    # 线上模型实为 CalibratedClassifierCV(5 折等渗回归) 包装的 GBDT，
+    # 裸 GBDT 旁路对它不生效。两类校准器都能化简成逐折标量运算：
+    # 等渗回归是阈值折线 (X_thresholds_, y_thresholds_) 上的一次线性
+    # 插值（越界取端点，等价于 out_of_bounds='clip'），sigmoid 校准是
+    # expit(-(a * raw + b))。预先抽出各折的 (基学习器, 校准参数)，
+    # 预测时按折求均值即可绕开 sklearn 的逐折 predict_proba 组装
+    fold_bypass = None
+    if (type(model).__name__ == "CalibratedClassifierCV"
+            and len(getattr(model, "classes_", ())) == 2):
+        folds = []
+        for cc in getattr(model, "calibrated_classifiers_", ()):
+            cal = (getattr(cc, "calibrators", None)
+                   or getattr(cc, "calibrators_", [None]))[0]
+            est = getattr(cc, "estimator", None) or getattr(
+                cc, "base_estimator", None)
+            if not hasattr(est, "decision_function"):
+                folds = None
+                break
+            cal_name = type(cal).__name__
+            if cal_name == "IsotonicRegression":
+                folds.append((est, np.asarray(cal.X_thresholds_),
+                              np.asarray(cal.y_thresholds_)))
+            elif cal_name == "_SigmoidCalibration":
+                folds.append((est, float(cal.a_), float(cal.b_)))
+            else:
+                folds = None
+                break
+        fold_bypass = folds or None
+    return (model, norm_stats, encoder_luts, feat_index, features,
+            use_raw_score, fcamt_mean, fold_bypass)
+
+
+@st.cache_data(max_entries=512)
+def predict_cached(items_tuple):
+    """特征对齐 -> 编码 -> 标准化 -> 概率预测；相同输入直接命中缓存。
+
+    items_tuple 只含界面采集到的特征，其余特征保持默认值 0，
+    因此散射写入的开销与控件数量而非特征总数成正比。
+    """
+    (model, norm_stats, encoder_luts, feat_index, features,
+     use_raw_score, fcamt_mean, fold_bypass) = load_assets()
+    row = np.zeros((1, len(features)), dtype=np.float32)
+    for f, v in items_tuple:
+        i = feat_index.get(f)
+        if i is None:
+            continue
+        v = _to_training_value(f, v, fcamt_mean)
+        lut = encoder_luts.get(f)
+        if lut is None:
+            row[0, i] = float(v)
+            continue
+        code = lut.get(str(v))
+        if code is None:
+            # 数值型类别在训练词表里是 '1.0' 这类浮点串，按该格式重试
+            try:
+                code = lut.get(str(float(v)))
+            except (TypeError, ValueError):
+                code = None
+        if code is None:
+            # 默默退回类别 0 会把编码问题伪装成"正常"预测，宁可当场报错
+            raise ValueError(f"特征 {f} 的取值 {v!r} 不在训练词表内，无法编码")
+        row[0, i] = code
+    if norm_stats is not None:
+        mean, inv_scale = norm_stats
+        input_scaled = (row - mean) * inv_scale
+    else:
+        input_scaled = row
+    if use_raw_score:
+        raw = float(model.decision_function(input_scaled)[0])
+        return 1.0 / (1.0 + math.exp(-raw))
+    if fold_bypass is not None:
+        # 按折求均值：等渗折做一次 np.interp，sigmoid 折做一次标量 expit
+        prob = 0.0
+        for est, p1, p2 in fold_bypass:
+            raw = float(est.decision_function(input_scaled)[0])
+            if isinstance(p1, np.ndarray):
+                prob += float(np.interp(raw, p1, p2))
+            else:
+                prob += 1.0 / (1.0 + math.exp(p1 * raw + p2))
+        return prob / len(fold_bypass)
+    return float(model.predict_proba(input_scaled)[:, 1][0])